@@ -1,12 +1,17 @@
 import streamlit as st
-import pandas as pd
 import math
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use("Agg") # Streamlit only needs rendered images; skip GUI backend probing
 import matplotlib.patches as patches
+import matplotlib.style as mpl_style # Figures are built with the OO API; pyplot is never needed
+from matplotlib.collections import PatchCollection, PolyCollection
+from matplotlib.figure import Figure
 import numpy as np
-from fpdf import FPDF
-import tempfile
-import os
+import io
+import uuid
+import threading
+
+from axion_physics import get_torque, compute_moments # Imported module: built once per process
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -17,27 +22,453 @@ st.set_page_config(
 )
 
 # --- CONSTANTS & MATERIALS ---
-MATERIALS = {
-    "AISI 1020 (Low Carbon)": [295, 380],
-    "AISI 1045 (Med Carbon)": [310, 565],
-    "AISI 4140 (Alloy Steel)": [655, 1000],
-    "Structural Steel (A36)": [250, 400],
-    "Custom (Enter Manually)": [0, 0]
+# Parallel name list + record array (Sy, Sut in MPa), so whole-table sweeps are one
+# NumPy call, e.g. np.minimum(0.3*MATERIALS_ARR['Sy'], 0.18*MATERIALS_ARR['Sut'])
+MATERIAL_NAMES = [
+    "AISI 1020 (Low Carbon)",
+    "AISI 1045 (Med Carbon)",
+    "AISI 4140 (Alloy Steel)",
+    "Structural Steel (A36)",
+    "Custom (Enter Manually)",
+]
+MATERIALS_ARR = np.array(
+    [(295, 380), (310, 565), (655, 1000), (250, 400), (0, 0)],
+    dtype=[('Sy', 'f8'), ('Sut', 'f8')]
+)
+
+# Gear mesh location -> (fh sign, fv sign, swap): fh, fv = sh*a, sv*b where
+# (a, b) = (Ft, Fr), or (Fr, Ft) when swapped (side meshes)
+MESH_TABLE = {
+    "Top": (1, -1, False),
+    "Bottom": (-1, 1, False),
+    "Right": (-1, 1, True),
+    "Left": (1, -1, True),
+}
+
+# Belt tension direction -> (fh sign, fv sign) on the bending force
+PULLEY_TABLE = {
+    "Vertical": (0, -1),
+    "Horizontal": (-1, 0),
 }
 
 # --- SESSION STATE INITIALIZATION ---
+# Components are stored column-wise (one list per field) so the analysis can
+# lift them straight into NumPy arrays without walking per-component dicts.
+# 'params' holds geometry, not forces: Bearing (), Gear (z, m, pressure°, mesh),
+# Pulley (dia, belt factor, direction). Loads are derived from the current torque.
+# 'id' is a stable per-row key so widget keys survive deletions of earlier rows.
+COMPONENT_FIELDS = ('id', 'type', 'pos', 'params', 'desc')
+
+def empty_components():
+    return {key: [] for key in COMPONENT_FIELDS}
+
+def add_component(c_type, pos, params, desc):
+    """Appends one component row across all field columns"""
+    comps = st.session_state.components
+    for key, val in zip(COMPONENT_FIELDS, (uuid.uuid4().hex, c_type, pos, params, desc)):
+        comps[key].append(val)
+
+def remove_component(c_id):
+    """Drops the row with id c_id from every field column"""
+    comps = st.session_state.components
+    i = comps['id'].index(c_id)
+    for col in comps.values():
+        del col[i]
+
 if 'components' not in st.session_state:
-    st.session_state.components = []
+    st.session_state.components = empty_components()
 if 'run_analysis' not in st.session_state:
     st.session_state.run_analysis = False
 
 # --- PHYSICS ENGINE ---
-def get_torque(P_kw, N_rpm):
-    """Calculates Torque in N-mm from Power (kW) and Speed (RPM)"""
-    if N_rpm <= 0: return 0
-    P = P_kw * 1000 # Convert to Watts
-    # T = (P * 60) / (2 * pi * N)
-    return ((P * 60) / (2 * math.pi * N_rpm)) * 1000
+def component_loads(c_type, c_params, T_nmm):
+    """Derives (fv, fh) arrays in N for every component from its geometry and torque T"""
+    fv = np.zeros(len(c_type))
+    fh = np.zeros(len(c_type))
+    for i, (t, prm) in enumerate(zip(c_type, c_params)):
+        if t == "Gear":
+            z, m, press, mesh = prm
+            Ft = T_nmm / ((z * m) / 2)
+            Fr = Ft * math.tan(math.radians(press))
+            sh, sv, swap = MESH_TABLE[mesh]
+            a, b = (Fr, Ft) if swap else (Ft, Fr)
+            fh[i], fv[i] = sh * a, sv * b
+        elif t == "Pulley":
+            dia, fact, direction = prm
+            F_bend = fact * (T_nmm / (dia / 2))
+            sh, sv = PULLEY_TABLE[direction]
+            fh[i], fv[i] = sh * F_bend, sv * F_bend
+    return fv, fh
+
+@st.cache_data(show_spinner=False)
+def build_inventory_df(c_type, c_pos, c_params, c_desc, P_kw, N_rpm):
+    """Display-ready inventory table (loads from the current torque); rebuilt only when
+    the components or (P, N) change"""
+    import pandas as pd # Deferred: only needed once the nexus has components
+    fv, fh = component_loads(c_type, c_params, get_torque(P_kw, N_rpm))
+    return pd.DataFrame({"Element": c_type, "Axial Pos": c_pos, "V-Load": fv, "H-Load": fh, "Specs": c_desc})
+
+@st.cache_data(show_spinner=False)
+def get_x_vals(L):
+    """Axial sample stations (mm, 5 mm pitch) for a shaft of length L"""
+    return np.arange(0, int(L) + 1, 5, dtype=np.float64)
+
+@st.cache_data(show_spinner=False)
+def analyze_shaft(c_type, c_pos, c_params, P_kw, N_rpm, L, Sy, Sut, Kb, Kt, keyway):
+    """Solves reactions, moment diagrams and the ASME minimum diameter for one input set.
+    Component columns come in as tuples so identical inputs hit the cache; expects
+    exactly two bearings at distinct positions. Returns arrays/scalars, never figures."""
+    T_nmm = get_torque(P_kw, N_rpm)
+    c_fv, c_fh = component_loads(c_type, c_params, T_nmm)
+    c_pos = np.array(c_pos, dtype=np.float64)
+    is_brg = np.array(c_type) == "Bearing"
+    loads = ~is_brg
+    b1_pos, b2_pos = np.sort(c_pos[is_brg])
+    L_span = b2_pos - b1_pos
+
+    # Solve Reactions (both planes at once: row 0 = V, row 1 = H)
+    f_mat = np.array([c_fv, c_fh], dtype=np.float64)[:, loads]
+    m_sum = f_mat @ (c_pos[loads] - b1_pos)
+    f_sum = f_mat.sum(axis=1)
+    Rb = -m_sum / L_span
+    Ra = -f_sum - Rb
+    Rav, Rah = Ra
+    Rbv, Rbh = Rb
+
+    # Generate Moment Arrays (Macaulay brackets, bearings as point loads)
+    pos = np.ascontiguousarray(np.append(c_pos[loads], [b1_pos, b2_pos]))
+    fv = np.ascontiguousarray(np.append(f_mat[0], [Rav, Rbv]))
+    fh = np.ascontiguousarray(np.append(f_mat[1], [Rah, Rbh]))
+
+    # M_v/M_h are piecewise linear between load points and hypot() of a linear pair is
+    # convex, so the exact max_M sits on a breakpoint: solve only there (O(K) stations).
+    x_bp = np.unique(np.clip(np.append(pos, [0.0, L]), 0.0, L))
+    M_bp = compute_moments(x_bp, pos, fv, fh)
+    max_M = np.hypot(M_bp[0], M_bp[1]).max(initial=0.0)
+
+    # Display stations: 5 mm grid plus the breakpoints so corners plot exactly;
+    # V/H interpolate exactly, the resultant is re-evaluated for its curvature.
+    x_vals = np.union1d(get_x_vals(L), x_bp)
+    M_v = np.interp(x_vals, x_bp, M_bp[0])
+    M_h = np.interp(x_vals, x_bp, M_bp[1])
+    M_res = np.hypot(M_v, M_h)
+
+    # Allowable shear & equivalent moment (ASME)
+    base_tau = min(0.3*Sy, 0.18*Sut)
+    tau_allow = base_tau * 0.75 if keyway else base_tau
+
+    M_eq = math.hypot(Kb*max_M, Kt*T_nmm)
+    d_req = ((16*M_eq)/(math.pi*tau_allow))**(1/3) if tau_allow > 0 else 0
+
+    return {
+        'fv': c_fv, 'fh': c_fh, 'Rav': Rav, 'Rah': Rah, 'Rbv': Rbv, 'Rbh': Rbh,
+        'x_vals': x_vals, 'max_M': max_M,
+        'moments_nm': np.vstack((M_v, M_h, M_res)) / 1000, # rows V, H, resultant in Nm (only copy kept)
+        'T_nmm': T_nmm, 'base_tau': base_tau, 'tau_allow': tau_allow, 'M_eq': M_eq, 'd_req': d_req,
+    }
+
+# --- MOMENT PLOTS (SHARED BY DASHBOARD & PDF) ---
+MOMENT_PANELS = (
+    # (dashboard colour, dashboard label, print colour, print title, print y-label)
+    ("#00e5ff", "VERTICAL BENDING (Nm)", 'blue', "Vertical Bending Moment", "Vert (Nm)"),
+    ("#e040fb", "HORIZONTAL BENDING (Nm)", 'green', "Horizontal Bending Moment", "Horz (Nm)"),
+    ("#ffea00", "RESULTANT (Max: {max_nm:.1f} Nm)", 'red', "Resultant Moment (Max: {max_nm:.1f} Nm)", "Res (Nm)"),
+)
+
+def init_moment_panels(axes, for_print=False):
+    """Creates the (initially empty) line, fill and label artists of the three moment panels,
+    in dashboard or data-sheet style. Data is pushed in later by update_moment_panels."""
+    panels = []
+    for ax, (dash_c, dash_lbl, prn_c, prn_title, prn_ylabel) in zip(axes, MOMENT_PANELS):
+        if for_print:
+            line, = ax.plot([], [], color=prn_c); ax.set_ylabel(prn_ylabel); ax.grid(True, alpha=0.3)
+            label = ax.set_title("", fontsize=8, color=prn_c, loc='left')
+            color, fmt, alpha = prn_c, prn_title, 0.1
+        else:
+            line, = ax.plot([], [], color=dash_c, lw=1.5)
+            ax.grid(True, color="#444", linestyle=':')
+            label = ax.text(0.02, 0.9, "", transform=ax.transAxes, color=dash_c, fontweight='bold')
+            color, fmt, alpha = dash_c, dash_lbl, 0.2
+        # Area under the curve; same look as fill_between(color=..., alpha=...)
+        fill = ax.add_collection(PolyCollection([], facecolors=color, edgecolors=color, alpha=alpha),
+                                 autolim=False)
+        panels.append({'ax': ax, 'line': line, 'label': label, 'fmt': fmt, 'fill': fill})
+    return panels
+
+def update_moment_panels(panels, x_vals, moments_nm, max_M):
+    """Pushes moment diagrams (Nm) into the existing line and fill artists in place
+    instead of re-plotting (the fill polygon is the curve closed on the zero baseline)."""
+    for p, y in zip(panels, moments_nm):
+        p['line'].set_data(x_vals, y)
+        verts = np.column_stack((np.r_[x_vals[0], x_vals, x_vals[-1]], np.r_[0.0, y, 0.0]))
+        p['fill'].set_verts([verts])
+        p['ax'].relim()
+        p['ax'].update_datalim(verts) # Keep the baseline in view, as fill_between would
+        p['label'].set_text(p['fmt'].format(max_nm=max_M / 1000))
+        p['ax'].autoscale_view()
+
+def clear_moment_panels(panels):
+    """Empties the panels (no analysis to show) while keeping their artists"""
+    for p in panels:
+        p['line'].set_data([], [])
+        p['fill'].set_verts([])
+        p['label'].set_text("")
+        p['ax'].set_ylim(0, 1, auto=True) # Blank scale until data arrives
+
+# --- SCHEMATIC (ALTAIR, RENDERED CLIENT-SIDE) ---
+# Element type -> (colour, half-width, bottom, top, label height) in schematic units
+SCHEMATIC_STYLE = {
+    "Bearing": ("#3498db", 10, -25, -10, -38),
+    "Gear": ("#e74c3c", 10, -40, 40, 50),
+    "Pulley": ("#2ecc71", 15, -30, 30, 40),
+}
+SCHEMATIC_LABELS = {"Bearing": "Brg", "Gear": "Gear", "Pulley": "Pulley"}
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def schematic_spec(len_input, c_type, c_pos):
+    """Shaft layout as a small Vega-Lite spec dict; the browser draws it, so no PNG per
+    rerun. Keyed on geometry, so unchanged layouts skip Altair building/validation."""
+    import altair as alt # Deferred: ~185 ms import, paid only on the first schematic render
+    rows = []
+    for t, x in zip(c_type, c_pos):
+        color, half_w, y0, y1, y_lbl = SCHEMATIC_STYLE[t]
+        rows.append({'type': t, 'x': x, 'x0': x - half_w, 'x1': x + half_w, 'y0': y0, 'y1': y1,
+                     'y_lbl': y_lbl, 'label': SCHEMATIC_LABELS[t], 'color': color})
+    data = alt.Data(values=rows) # Inline rows: no DataFrame (or pandas import) needed
+
+    x_scale = alt.Scale(domain=[-50, len_input + 50], nice=False, zero=False)
+    y_scale = alt.Scale(domain=[-80, 80], nice=False)
+    X = lambda f: alt.X(f + ':Q', scale=x_scale, axis=None)
+    Y = lambda f: alt.Y(f + ':Q', scale=y_scale, axis=None)
+    color = alt.Color('color:N', scale=None)
+
+    # Shaft Body
+    shaft = {'x0': 0, 'x1': len_input, 'y0': -10, 'y1': 10}
+    center = {'x0': -20, 'x1': len_input + 20, 'y0': 0}
+    body = alt.Chart(alt.Data(values=[shaft])).mark_rect(color="#7f8c8d", opacity=0.9).encode(
+        x=X('x0'), x2='x1:Q', y=Y('y0'), y2='y1:Q')
+    axis_line = alt.Chart(alt.Data(values=[center])).mark_rule(color="#555", strokeDash=[6, 3]).encode(
+        x=X('x0'), x2='x1:Q', y=Y('y0'))
+
+    # Components (bearings as support triangles, gears/pulleys as hubs)
+    comps = alt.Chart(data)
+    brg = comps.transform_filter(alt.datum.type == "Bearing").mark_point(
+        shape='triangle-up', filled=True, size=250, opacity=1).encode(
+        x=X('x'), y=Y('y0'), color=color)
+    hubs = comps.transform_filter(alt.datum.type != "Bearing").mark_rect(
+        opacity=0.7, stroke='white').encode(x=X('x0'), x2='x1:Q', y=Y('y0'), y2='y1:Q', color=color)
+    labels = comps.mark_text(fontSize=11).encode(x=X('x'), y=Y('y_lbl'), text='label:N', color=color)
+
+    return alt.layer(body, axis_line, hubs, brg, labels).properties(
+        height=180, title="GEOMETRIC TOPOLOGY").configure_view(strokeWidth=0).to_dict()
+
+# --- FIGURE CACHE ---
+@st.cache_resource
+def mpl_style_lock():
+    """Process-wide lock around styled rendering. style.context swaps the *global*
+    rcParams, and sessions / download callables render on separate threads, so an
+    unguarded dark dashboard render could bleed into a concurrent white PDF render."""
+    return threading.Lock()
+
+def get_dashboard_fig():
+    """Returns this session's 3-panel moment figure, building it and its artists once.
+    Reruns only push new data into the existing moment lines. Kept per session (not
+    cache_resource) so concurrent sessions never draw into the same figure."""
+    if 'dashboard_fig' not in st.session_state:
+        fig = Figure(figsize=(10, 9)) # OO API: lives exactly as long as the session
+        gs = fig.add_gridspec(3, 1, height_ratios=[1, 1, 1.5])
+
+        ax1 = fig.add_subplot(gs[0])
+        ax2 = fig.add_subplot(gs[1])
+        ax3 = fig.add_subplot(gs[2])
+
+        st.session_state.dashboard_fig = (fig, init_moment_panels((ax1, ax2, ax3)))
+    return st.session_state.dashboard_fig
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_dashboard(len_input, res=None):
+    """Draws the moment panels (blank until an analysis result is given) into this
+    session's figure and returns it as PNG bytes. Keyed on length and results, so reruns
+    with nothing new to show skip drawing and PNG encoding."""
+    # Style applies while drawing: artists and lazily built ticks both read rcParams
+    with mpl_style_lock(), mpl_style.context('dark_background'):
+        fig, panels = get_dashboard_fig()
+        for p in panels:
+            p['ax'].set_xlim(-50, len_input + 50) # Explicit limits: x never autoscales, no sharex
+
+        if res is None:
+            clear_moment_panels(panels)
+        else:
+            update_moment_panels(panels, res['x_vals'], res['moments_nm'], res['max_M'])
+
+        # Same savefig settings st.pyplot would use
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', dpi=200, bbox_inches='tight')
+    return buf.getvalue()
+
+# ==========================================
+# FPDF REPORT GENERATION (MATCHING REPORT2.PDF)
+# ==========================================
+# Table layout for section 2 (component loads)
+LOAD_TABLE_HEADERS = ["TYPE", "POS (mm)", "F_VERT (N)", "F_HORZ (N)"]
+LOAD_TABLE_WIDTHS = [40, 30, 40, 40]
+
+def _new_pdf():
+    """Starts a data sheet: fresh FPDF with the static page-1 header already laid out"""
+    from fpdf import FPDF # Deferred: only needed once a report is downloaded
+    pdf = FPDF()
+
+    # --- PAGE 1: DATA SHEET ---
+    pdf.add_page()
+    pdf.set_font("helvetica", "B", 16)
+    pdf.cell(0, 10, "DESIGN DATA SHEET", new_x="LMARGIN", new_y="NEXT", align='C')
+    pdf.set_font("helvetica", "", 12)
+    pdf.cell(0, 10, "ASME B106.1M Shaft Analysis", new_x="LMARGIN", new_y="NEXT", align='C')
+    pdf.line(10, 30, 200, 30)
+    pdf.ln(10)
+    return pdf
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def render_pdf_diagrams(len_input, c_type, c_pos, x_vals, M_v_nm, M_h_nm, M_res_nm, max_M):
+    """Page-2 layout + moment diagrams (print style) as PNG bytes. Cached on geometry and
+    moment data only, so report edits that change just the text reuse the image."""
+    # Temporarily switch plot style to WHITE for printing
+    with mpl_style_lock(), mpl_style.context('default'):
+        fig_pdf = Figure(figsize=(8, 10)) # Taller figure; OO API, never enters the pyplot registry
+        gs_pdf = fig_pdf.add_gridspec(4, 1, height_ratios=[1, 1, 1, 1.2])
+
+        ax_p0 = fig_pdf.add_subplot(gs_pdf[0])
+        ax_p1 = fig_pdf.add_subplot(gs_pdf[1])
+        ax_p2 = fig_pdf.add_subplot(gs_pdf[2])
+        ax_p3 = fig_pdf.add_subplot(gs_pdf[3])
+
+        # Schematic on PDF
+        ax_p0.set_title("Shaft Layout Model", fontsize=9)
+        ax_p0.set_xlim(-50, len_input+50); ax_p0.set_ylim(-50, 50)
+        ax_p0.axis('off')
+        ax_p0.plot([-20, len_input+20], [0, 0], '-.', color='black', lw=0.5)
+        ax_p0.add_patch(patches.Rectangle((0, -5), len_input, 10, fc='lightgray', ec='black'))
+        # Add components to schematic (one PatchCollection; each patch keeps its own style)
+        pdf_patches = []
+        for t, cx in zip(c_type, c_pos):
+            if t == "Bearing":
+                pdf_patches.append(patches.Polygon([[cx, -5], [cx-5, -15], [cx+5, -15]], fc='white', ec='black'))
+                ax_p0.text(cx, -20, "Brg", ha='center', fontsize=6)
+            elif t in ["Gear", "Pulley"]:
+                color = 'salmon' if t=="Gear" else 'skyblue'
+                pdf_patches.append(patches.Rectangle((cx-5, -20), 10, 40, fc=color, alpha=0.5))
+                ax_p0.text(cx, 22, t, ha='center', fontsize=6)
+        ax_p0.add_collection(PatchCollection(pdf_patches, match_original=True))
+
+        # Graphs (same arrays and plotting routine as the dashboard)
+        pdf_panels = init_moment_panels((ax_p1, ax_p2, ax_p3), for_print=True)
+        for p in pdf_panels:
+            p['ax'].set_xlim(-50, len_input + 50) # Same span as the layout model above
+        update_moment_panels(pdf_panels, x_vals, (M_v_nm, M_h_nm, M_res_nm), max_M)
+
+        fig_pdf.tight_layout()
+
+        img_buf = io.BytesIO()
+        fig_pdf.savefig(img_buf, format='png', dpi=100, pil_kwargs={'compress_level': 1}) # Fast zlib; 100 dpi is ample at 190 mm
+    return img_buf.getvalue()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def build_pdf(inputs, results, components, x_vals, M_v_nm, M_h_nm, M_res_nm):
+    """Renders the 3-page design data sheet. Cached on the analysis inputs so
+    repeat downloads (and reruns) never rebuild the figure or the FPDF document."""
+    (p_input, n_input, len_input, mat_choice,
+     sy_input, sut_input, kb_input, kt_input, keyway_present) = inputs
+    T_nmm, Rav, Rah, Rbv, Rbh, max_M, base_tau, tau_allow, M_eq, d_req = results
+
+    pdf = _new_pdf()
+
+    # 1. GLOBAL PARAMETERS
+    pdf.set_font("helvetica", "B", 11)
+    pdf.cell(0, 8, "1. GLOBAL PARAMETERS", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("helvetica", "", 10)
+
+    # Use a grid-like text dump for parameters
+    p_text = f"Power: {p_input} kW\nSpeed: {n_input} RPM\nTorque: {T_nmm/1000:.2f} Nm\nLength: {len_input} mm\nMaterial: {mat_choice}"
+    pdf.multi_cell(0, 6, p_text)
+    pdf.ln(5)
+
+    # 2. COMPONENT LOADS
+    pdf.set_font("helvetica", "B", 11)
+    pdf.cell(0, 8, "2. COMPONENT LOADS", new_x="LMARGIN", new_y="NEXT")
+
+    # Table Header
+    pdf.set_fill_color(240, 240, 240)
+    pdf.set_font("helvetica", "B", 9)
+    headers, w = LOAD_TABLE_HEADERS, LOAD_TABLE_WIDTHS
+    for i, h in enumerate(headers):
+        pdf.cell(w[i], 8, h, 1, align="C", fill=True)
+    pdf.ln()
+
+    # Table Rows
+    pdf.set_font("helvetica", "", 9)
+    for c_type, c_pos, c_fv, c_fh in components:
+        pdf.cell(w[0], 8, str(c_type), 1)
+        pdf.cell(w[1], 8, str(int(c_pos)), 1)
+        pdf.cell(w[2], 8, str(int(c_fv)), 1)
+        pdf.cell(w[3], 8, str(int(c_fh)), 1, new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(5)
+
+    # 3. CALCULATED REACTIONS
+    pdf.set_font("helvetica", "B", 11)
+    pdf.cell(0, 8, "3. CALCULATED REACTIONS", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("helvetica", "", 10)
+
+    # Reactions A & B (one text block instead of a cell per field)
+    pdf.multi_cell(0, 6, f"Bearing A (Left): Vert {Rav:.1f} N / Horz {Rah:.1f} N\n"
+                         f"Bearing B (Right): Vert {Rbv:.1f} N / Horz {Rbh:.1f} N")
+
+    # --- PAGE 2: IMAGES ---
+    pdf.add_page()
+    pdf.set_font("helvetica", "B", 14)
+    pdf.cell(0, 10, "SHAFT LAYOUT & MOMENT DIAGRAMS", new_x="LMARGIN", new_y="NEXT", align='C')
+    pdf.ln(5)
+
+    # Save & Embed (in memory, no temp file round-trip)
+    img_png = render_pdf_diagrams(len_input, tuple(c[0] for c in components), tuple(c[1] for c in components),
+                                  x_vals, M_v_nm, M_h_nm, M_res_nm, max_M)
+    pdf.image(io.BytesIO(img_png), x=10, y=40, w=190)
+
+    # --- PAGE 3: DETAILED CALCULATIONS ---
+    pdf.add_page()
+    pdf.set_font("helvetica", "B", 12)
+    pdf.cell(0, 10, "DETAILED CALCULATIONS", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(5)
+
+    # A. Allowable Stress
+    pdf.set_font("helvetica", "B", 10)
+    pdf.cell(0, 6, "A. Allowable Stress (Tau)", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("helvetica", "", 10)
+    pdf.multi_cell(0, 6, f"Sy: {sy_input} MPa, Sut: {sut_input} MPa\n"
+                         f"Base Tau = min(0.3*Sy, 0.18*Sut) = {base_tau:.1f} MPa\n"
+                         f"Keyway Factor = {0.75 if keyway_present else 1.0}\n"
+                         f"Final Tau_allow = {tau_allow:.2f} MPa")
+    pdf.ln(5)
+
+    # B. Equivalent Moment
+    pdf.set_font("helvetica", "B", 10)
+    pdf.cell(0, 6, "B. Equivalent Moment (M_eq)", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("helvetica", "", 10)
+    pdf.multi_cell(0, 6, f"Max Bending (M) = {max_M/1000:.1f} Nm\n"
+                         f"Torque (T) = {T_nmm/1000:.1f} Nm\n"
+                         f"Shock Factors: Kb={kb_input}, Kt={kt_input}\n"
+                         "M_eq = sqrt( (Kb*M)^2 + (Kt*T)^2 )\n"
+                         f"M_eq = {M_eq/1000:.1f} Nm")
+    pdf.ln(5)
+
+    # C. Diameter
+    pdf.set_font("helvetica", "B", 10)
+    pdf.cell(0, 6, "C. Diameter Calculation", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("helvetica", "", 10)
+    pdf.cell(0, 6, "d = [ (16 * M_eq) / (pi * Tau) ] ^ (1/3)", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("helvetica", "B", 12)
+    pdf.cell(0, 10, f"d = {d_req:.3f} mm", new_x="LMARGIN", new_y="NEXT")
+
+    return bytes(pdf.output())
 
 # --- UI LAYOUT ---
 st.title("⚛️ KINETIC NEXUS | Design Engine")
@@ -53,114 +484,103 @@ col_input, col_viz = st.columns([1, 1.5])
 with col_input:
     # 1. SPECIFICATIONS CARD
     with st.expander("1. KINETIC PARAMETERS", expanded=True):
-        st.caption("System Inputs")
-        c1, c2 = st.columns(2)
-        p_input = c1.number_input("Power (kW)", value=10.0, step=0.5)
-        n_input = c2.number_input("Speed (RPM)", value=500.0, step=10.0)
-        len_input = st.number_input("Shaft Length (mm)", value=1000.0, step=50.0)
-        
+        # Material sits outside the form: Sy/Sut defaults must refresh as soon as it
+        # changes, or a Sy/Sut typed in the same submit would be reset to the defaults
         st.caption("Material Matrix")
-        mat_choice = st.selectbox("Material Class", list(MATERIALS.keys()))
-        def_sy, def_sut = MATERIALS[mat_choice]
+        mat_choice = st.selectbox("Material Class", MATERIAL_NAMES,
+                                  on_change=lambda: st.session_state.update(run_analysis=False))
+        mat_row = MATERIALS_ARR[MATERIAL_NAMES.index(mat_choice)]
+        def_sy, def_sut = mat_row['Sy'], mat_row['Sut']
+
+        # Batched in a form: edits only trigger a rerun when applied
+        with st.form("design_form", border=False):
+            st.caption("System Inputs")
+            c1, c2 = st.columns(2)
+            p_input = c1.number_input("Power (kW)", value=10.0, step=0.5)
+            n_input = c2.number_input("Speed (RPM)", value=500.0, step=10.0)
+            len_input = st.number_input("Shaft Length (mm)", value=1000.0, step=50.0)
         
-        c3, c4 = st.columns(2)
-        sy_input = c3.number_input("Yield (Sy)", value=float(def_sy))
-        sut_input = c4.number_input("Ultimate (Sut)", value=float(def_sut))
+            st.caption("Material Strength (MPa)")
+            c3, c4 = st.columns(2)
+            sy_input = c3.number_input("Yield (Sy)", value=float(def_sy))
+            sut_input = c4.number_input("Ultimate (Sut)", value=float(def_sut))
         
-        st.caption("Safety Coefficients (ASME)")
-        f1, f2 = st.columns(2)
-        kb_input = f1.number_input("Kb (Bend)", value=1.5)
-        kt_input = f2.number_input("Kt (Torsion)", value=1.0)
-        keyway_present = st.checkbox("Keyway Geometry (0.75 shear factor)", value=True)
+            st.caption("Safety Coefficients (ASME)")
+            f1, f2 = st.columns(2)
+            kb_input = f1.number_input("Kb (Bend)", value=1.5)
+            kt_input = f2.number_input("Kt (Torsion)", value=1.0)
+            keyway_present = st.checkbox("Keyway Geometry (0.75 shear factor)", value=True)
+            if st.form_submit_button("Apply Parameters", width="stretch"):
+                st.session_state.run_analysis = False # Re-arm: results need a fresh activation
 
     # 2. COMPONENT MANAGER CARD
     with st.expander("2. LOAD CONFIGURATOR", expanded=True):
         tab_b, tab_g, tab_p = st.tabs(["Bearing", "Gear", "Pulley"])
         
+        # Each tab is a form: editing its fields doesn't rerun, only the mount button does
         # BEARING LOGIC
-        with tab_b:
+        with tab_b, st.form("bearing_form", border=False):
             b_pos = st.number_input("Position (mm)", value=0, key="b_p")
-            if st.button("Initialize Bearing", type="primary"):
-                st.session_state.components.append({
-                    'type': "Bearing", 'pos': b_pos, 'fv': 0, 'fh': 0, 'desc': "Support"
-                })
+            if st.form_submit_button("Initialize Bearing", type="primary"):
+                add_component("Bearing", b_pos, (), "Support")
                 st.session_state.run_analysis = False # Reset analysis on change
                 st.rerun()
 
         # GEAR LOGIC
-        with tab_g:
+        with tab_g, st.form("gear_form", border=False):
             g_pos = st.number_input("Position (mm)", value=500, key="g_p")
             c1, c2 = st.columns(2)
             g_teeth = c1.number_input("Teeth (Z)", value=40)
             g_mod = c2.number_input("Module (m)", value=4.0)
             g_press = st.number_input("Pressure (°)", value=20.0)
-            g_mesh = st.selectbox("Mesh Loc", ["Top", "Bottom", "Right", "Left"])
+            g_mesh = st.selectbox("Mesh Loc", list(MESH_TABLE.keys()))
             
-            if st.button("Mount Gear", type="primary"):
-                radius = (g_teeth * g_mod) / 2
-                T_nmm = get_torque(p_input, n_input)
-                if radius > 0 and T_nmm > 0:
-                    Ft = T_nmm / radius
-                    Fr = Ft * math.tan(math.radians(g_press))
-                    fv, fh = 0, 0
-                    if g_mesh == "Top": fh, fv = Ft, -Fr
-                    elif g_mesh == "Bottom": fh, fv = -Ft, Fr
-                    elif g_mesh == "Right": fh, fv = -Fr, Ft
-                    elif g_mesh == "Left": fh, fv = Fr, -Ft
-                    
-                    st.session_state.components.append({
-                        'type': "Gear", 'pos': g_pos, 'fv': fv, 'fh': fh, 
-                        'desc': f"Z{int(g_teeth)} m{int(g_mod)}"
-                    })
+            if st.form_submit_button("Mount Gear", type="primary"):
+                if g_teeth * g_mod > 0:
+                    add_component("Gear", g_pos, (g_teeth, g_mod, g_press, g_mesh),
+                                  f"Z{int(g_teeth)} m{int(g_mod)}")
                     st.session_state.run_analysis = False # Reset analysis on change
                     st.rerun()
 
         # PULLEY LOGIC
-        with tab_p:
+        with tab_p, st.form("pulley_form", border=False):
             pu_pos = st.number_input("Position (mm)", value=800, key="p_p")
             pu_dia = st.number_input("Diameter (mm)", value=150)
             pu_fact = st.number_input("Belt Factor", value=1.5)
-            pu_dir = st.selectbox("Tension Dir", ["Vertical", "Horizontal"])
+            pu_dir = st.selectbox("Tension Dir", list(PULLEY_TABLE.keys()))
             
-            if st.button("Mount Pulley", type="primary"):
-                r = pu_dia / 2
-                T_nmm = get_torque(p_input, n_input)
-                if r > 0 and T_nmm > 0:
-                    F_bend = pu_fact * (T_nmm / r)
-                    fv = -F_bend if pu_dir == "Vertical" else 0
-                    fh = -F_bend if pu_dir == "Horizontal" else 0
-                    st.session_state.components.append({
-                        'type': "Pulley", 'pos': pu_pos, 'fv': fv, 'fh': fh, 
-                        'desc': f"Dia {int(pu_dia)}"
-                    })
+            if st.form_submit_button("Mount Pulley", type="primary"):
+                if pu_dia > 0:
+                    add_component("Pulley", pu_pos, (pu_dia, pu_fact, pu_dir), f"Dia {int(pu_dia)}")
                     st.session_state.run_analysis = False # Reset analysis on change
                     st.rerun()
 
         # COMPONENT TABLE (PANDAS INTEGRATION)
         st.markdown("#### 📋 System Inventory")
-        if st.session_state.components:
-            # 1. Create DataFrame
-            df = pd.DataFrame(st.session_state.components)
-            
-            # 2. Format for Display (Select specific columns and rename)
-            display_df = df[['type', 'pos', 'fv', 'fh', 'desc']].copy()
-            display_df.columns = ["Element", "Axial Pos", "V-Load", "H-Load", "Specs"]
+        if st.session_state.components['type']:
+            # 1-2. Display DataFrame (cached; loads follow the current Power/Speed)
+            comps = st.session_state.components
+            display_df = build_inventory_df(
+                tuple(comps['type']), tuple(comps['pos']), tuple(comps['params']), tuple(comps['desc']),
+                p_input, n_input
+            )
             
             # 3. Show Table
             st.dataframe(display_df, use_container_width=True, hide_index=True)
 
             # 4. Deletion Controls
             with st.expander("🗑️ Dismantle Components"):
-                for i, c in enumerate(st.session_state.components):
+                comps = st.session_state.components
+                for c_id, c_type, c_pos in zip(comps['id'], comps['type'], comps['pos']):
                     c_txt, c_btn = st.columns([4, 1])
-                    c_txt.text(f"{c['type']} @ {c['pos']}mm")
-                    if c_btn.button("Purge", key=f"del_{i}"):
-                        del st.session_state.components[i]
+                    c_txt.text(f"{c_type} @ {c_pos}mm")
+                    if c_btn.button("Purge", key=f"del_{c_id}"):
+                        remove_component(c_id)
                         st.session_state.run_analysis = False # Reset analysis on change
                         st.rerun()
                 
                 if st.button("Reset Nexus", type="secondary"):
-                    st.session_state.components = []
+                    st.session_state.components = empty_components()
                     st.session_state.run_analysis = False
                     st.rerun()
         else:
@@ -176,286 +596,69 @@ with col_input:
 # ==========================================
 # RIGHT COLUMN: VISUALIZATION & ANALYSIS
 # ==========================================
-with col_viz:
+# Fragment: its own widgets (e.g. the download button) rerun only this column,
+# not the input column; full-app reruns (component/parameter changes) redraw it too.
+@st.fragment
+def render_results(len_input, p_input, n_input, mat_choice,
+                   sy_input, sut_input, kb_input, kt_input, keyway_present):
     st.header("3. ANALYTICAL READOUT")
     
-    # --- MATPLOTLIB SETUP (DARK MODE FOR UI) ---
-    plt.style.use('dark_background')
-    fig = plt.figure(figsize=(10, 12))
-    gs = fig.add_gridspec(4, 1, height_ratios=[1, 1, 1, 1.5])
-    
-    ax_cad = fig.add_subplot(gs[0])
-    ax1 = fig.add_subplot(gs[1], sharex=ax_cad)
-    ax2 = fig.add_subplot(gs[2], sharex=ax_cad)
-    ax3 = fig.add_subplot(gs[3], sharex=ax_cad)
+    # --- COMPONENT PREPASS ---
+    comps = st.session_state.components
+    comp_geom = (tuple(comps['type']), tuple(comps['pos']))
+    bearings = sorted(p for t, p in zip(*comp_geom) if t == "Bearing")
+    topology_ok = len(bearings) == 2 and bearings[1] - bearings[0] > 0
 
-    # --- DRAW SCHEMATIC (ALWAYS VISIBLE) ---
+    # --- CALCULATION LOGIC (ONLY IF BUTTON PRESSED) ---
+    res = None
+    if st.session_state.run_analysis and topology_ok:
+        res = analyze_shaft(
+            *comp_geom, tuple(comps['params']),
+            p_input, n_input, len_input, sy_input, sut_input, kb_input, kt_input, keyway_present
+        )
+
+    # --- SCHEMATIC + MOMENT PLOTS (ALWAYS VISIBLE) ---
     # We want users to see the setup before they run the math
-    ax_cad.set_ylim(-80, 80)
-    ax_cad.set_xlim(-50, len_input + 50)
-    ax_cad.axis('off')
-    ax_cad.set_title("GEOMETRIC TOPOLOGY", color="white", fontweight="bold")
-    
-    # Shaft Body
-    ax_cad.plot([-20, len_input+20], [0, 0], '-.', color="#555", lw=1)
-    ax_cad.add_patch(patches.Rectangle((0, -10), len_input, 20, fc="#7f8c8d", alpha=0.9))
-    
-    # Draw Components
-    for c in st.session_state.components:
-        x = c['pos']
-        if c['type'] == "Bearing":
-            ax_cad.add_patch(patches.Polygon([[x, -10], [x-10, -25], [x+10, -25]], fc="#3498db"))
-            ax_cad.text(x, -38, "Brg", ha='center', color="#3498db", fontsize=9)
-        elif c['type'] == "Gear":
-            ax_cad.add_patch(patches.Rectangle((x-10, -40), 20, 80, fc="#e74c3c", alpha=0.7, ec="white"))
-            ax_cad.text(x, 50, "Gear", ha='center', color="#e74c3c", fontsize=9)
-        elif c['type'] == "Pulley":
-            ax_cad.add_patch(patches.Rectangle((x-15, -30), 30, 60, fc="#2ecc71", alpha=0.7, ec="white"))
-            ax_cad.text(x, 40, "Pulley", ha='center', color="#2ecc71", fontsize=9)
+    st.vega_lite_chart(schematic_spec(len_input, *comp_geom), width="stretch")
+    st.image(render_dashboard(len_input, res), width="stretch")
 
-    # --- CALCULATION LOGIC (ONLY IF BUTTON PRESSED) ---
-    if st.session_state.run_analysis:
-        bearings = sorted([c for c in st.session_state.components if c['type'] == "Bearing"], key=lambda x: x['pos'])
-        
-        if len(bearings) == 2:
-            b1, b2 = bearings[0], bearings[1]
-            L_span = b2['pos'] - b1['pos']
-            
-            if L_span > 0:
-                # Solve Reactions
-                def solve_reactions(key):
-                    m_sum = sum(c[key] * (c['pos'] - b1['pos']) for c in st.session_state.components if c['type']!="Bearing")
-                    f_sum = sum(c[key] for c in st.session_state.components if c['type']!="Bearing")
-                    Rb = -m_sum / L_span
-                    Ra = -f_sum - Rb
-                    return Ra, Rb
-
-                Rav, Rbv = solve_reactions('fv')
-                Rah, Rbh = solve_reactions('fh')
-                
-                # Generate Moment Arrays
-                x_vals = np.arange(0, len_input + 1, 5)
-                M_v, M_h, M_res = [], [], []
-                max_M = 0
-                
-                for x in x_vals:
-                    mv, mh = 0, 0
-                    if x > b1['pos']: mv += Rav*(x-b1['pos']); mh += Rah*(x-b1['pos'])
-                    if x > b2['pos']: mv += Rbv*(x-b2['pos']); mh += Rbh*(x-b2['pos'])
-                    for c in st.session_state.components:
-                        if c['type']!="Bearing" and x > c['pos']:
-                            mv += c['fv']*(x-c['pos']); mh += c['fh']*(x-c['pos'])
-                    
-                    res = math.sqrt(mv**2 + mh**2)
-                    M_v.append(mv)
-                    M_h.append(mh)
-                    M_res.append(res)
-                    if res > max_M: max_M = res
-
-                # --- PLOT GRAPHS (UI) ---
-                def plot_line(ax, y_data, color, label):
-                    y_scaled = [y/1000 for y in y_data] # Convert to Nm
-                    ax.plot(x_vals, y_scaled, color=color, lw=1.5)
-                    ax.fill_between(x_vals, y_scaled, color=color, alpha=0.2)
-                    ax.grid(True, color="#444", linestyle=':')
-                    ax.text(0.02, 0.9, label, transform=ax.transAxes, color=color, fontweight='bold')
-                
-                plot_line(ax1, M_v, "#00e5ff", "VERTICAL BENDING (Nm)")
-                plot_line(ax2, M_h, "#e040fb", "HORIZONTAL BENDING (Nm)")
-                plot_line(ax3, M_res, "#ffea00", f"RESULTANT (Max: {max_M/1000:.1f} Nm)")
-                
-                st.pyplot(fig)
+    if res is not None:
+        x_vals, max_M = res['x_vals'], res['max_M']
+        Rav, Rah, Rbv, Rbh = res['Rav'], res['Rah'], res['Rbv'], res['Rbh']
+        T_nmm, tau_allow, M_eq, d_req = res['T_nmm'], res['tau_allow'], res['M_eq'], res['d_req']
+        M_v_nm, M_h_nm, M_res_nm = res['moments_nm'] # Converted to Nm once, in the cached analysis
 
-                # --- RESULTS BOX ---
-                T_nmm = get_torque(p_input, n_input)
-                tau_allow = min(0.3*sy_input, 0.18*sut_input)
-                if keyway_present: tau_allow *= 0.75
-                
-                M_eq = math.sqrt( (kb_input*max_M)**2 + (kt_input*T_nmm)**2 )
-                d_req = ((16*M_eq)/(math.pi*tau_allow))**(1/3) if tau_allow > 0 else 0
-                
-                st.success(f"### ✅ MINIMUM DIAMETER: {d_req:.3f} mm")
-                
-                with st.expander("See Calculation Details"):
-                    st.write(f"**Torque:** {T_nmm/1000:.2f} Nm")
-                    st.write(f"**Max Bending Moment:** {max_M/1000:.2f} Nm")
-                    st.write(f"**Allowable Shear:** {tau_allow:.2f} MPa")
-                    st.write(f"**Reaction A:** V:{int(Rav)}N / H:{int(Rah)}N")
-                    st.write(f"**Reaction B:** V:{int(Rbv)}N / H:{int(Rbh)}N")
-
-                # ==========================================
-                # FPDF REPORT GENERATION (MATCHING REPORT2.PDF)
-                # ==========================================
-                def generate_pdf():
-                    pdf = FPDF()
-                    
-                    # --- PAGE 1: DATA SHEET ---
-                    pdf.add_page()
-                    pdf.set_font("Arial", "B", 16)
-                    pdf.cell(0, 10, "DESIGN DATA SHEET", ln=True, align='C')
-                    pdf.set_font("Arial", "", 12)
-                    pdf.cell(0, 10, "ASME B106.1M Shaft Analysis", ln=True, align='C')
-                    pdf.line(10, 30, 200, 30)
-                    pdf.ln(10)
-
-                    # 1. GLOBAL PARAMETERS
-                    pdf.set_font("Arial", "B", 11)
-                    pdf.cell(0, 8, "1. GLOBAL PARAMETERS", ln=True)
-                    pdf.set_font("Arial", "", 10)
-                    
-                    # Use a grid-like text dump for parameters
-                    p_text = f"Power: {p_input} kW\nSpeed: {n_input} RPM\nTorque: {T_nmm/1000:.2f} Nm\nLength: {len_input} mm\nMaterial: {mat_choice}"
-                    pdf.multi_cell(0, 6, p_text)
-                    pdf.ln(5)
-
-                    # 2. COMPONENT LOADS
-                    pdf.set_font("Arial", "B", 11)
-                    pdf.cell(0, 8, "2. COMPONENT LOADS", ln=True)
-                    
-                    # Table Header
-                    pdf.set_fill_color(240, 240, 240)
-                    pdf.set_font("Arial", "B", 9)
-                    headers = ["TYPE", "POS (mm)", "F_VERT (N)", "F_HORZ (N)"]
-                    w = [40, 30, 40, 40]
-                    for i, h in enumerate(headers):
-                        pdf.cell(w[i], 8, h, 1, 0, 'C', fill=True)
-                    pdf.ln()
-                    
-                    # Table Rows
-                    pdf.set_font("Arial", "", 9)
-                    for c in st.session_state.components:
-                        pdf.cell(w[0], 8, str(c['type']), 1)
-                        pdf.cell(w[1], 8, str(int(c['pos'])), 1)
-                        pdf.cell(w[2], 8, str(int(c['fv'])), 1)
-                        pdf.cell(w[3], 8, str(int(c['fh'])), 1, 1)
-                    pdf.ln(5)
-
-                    # 3. CALCULATED REACTIONS
-                    pdf.set_font("Arial", "B", 11)
-                    pdf.cell(0, 8, "3. CALCULATED REACTIONS", ln=True)
-                    pdf.set_font("Arial", "", 10)
-                    
-                    # Reaction A
-                    pdf.cell(40, 6, "Bearing A (Left):", 0)
-                    pdf.cell(50, 6, f"Vert: {Rav:.1f} N", 0)
-                    pdf.cell(50, 6, f"Horz: {Rah:.1f} N", 0, 1)
-                    
-                    # Reaction B
-                    pdf.cell(40, 6, "Bearing B (Right):", 0)
-                    pdf.cell(50, 6, f"Vert: {Rbv:.1f} N", 0)
-                    pdf.cell(50, 6, f"Horz: {Rbh:.1f} N", 0, 1)
-                    
-                    # --- PAGE 2: IMAGES ---
-                    pdf.add_page()
-                    pdf.set_font("Arial", "B", 14)
-                    pdf.cell(0, 10, "SHAFT LAYOUT & MOMENT DIAGRAMS", ln=True, align='C')
-                    pdf.ln(5)
-                    
-                    # Temporarily switch plot style to WHITE for printing
-                    with plt.style.context('default'):
-                        fig_pdf = plt.figure(figsize=(8, 10)) # Taller figure
-                        gs_pdf = fig_pdf.add_gridspec(4, 1, height_ratios=[1, 1, 1, 1.2])
-                        
-                        ax_p0 = fig_pdf.add_subplot(gs_pdf[0])
-                        ax_p1 = fig_pdf.add_subplot(gs_pdf[1])
-                        ax_p2 = fig_pdf.add_subplot(gs_pdf[2])
-                        ax_p3 = fig_pdf.add_subplot(gs_pdf[3])
-                        
-                        # Schematic on PDF
-                        ax_p0.set_title("Shaft Layout Model", fontsize=9)
-                        ax_p0.set_xlim(-50, len_input+50); ax_p0.set_ylim(-50, 50)
-                        ax_p0.axis('off')
-                        ax_p0.plot([-20, len_input+20], [0, 0], '-.', color='black', lw=0.5)
-                        ax_p0.add_patch(patches.Rectangle((0, -5), len_input, 10, fc='lightgray', ec='black'))
-                        # Add components to schematic
-                        for c in st.session_state.components:
-                            cx = c['pos']
-                            if c['type'] == "Bearing":
-                                ax_p0.add_patch(patches.Polygon([[cx, -5], [cx-5, -15], [cx+5, -15]], fc='white', ec='black'))
-                                ax_p0.text(cx, -20, "Brg", ha='center', fontsize=6)
-                            elif c['type'] in ["Gear", "Pulley"]:
-                                color = 'salmon' if c['type']=="Gear" else 'skyblue'
-                                ax_p0.add_patch(patches.Rectangle((cx-5, -20), 10, 40, fc=color, alpha=0.5))
-                                ax_p0.text(cx, 22, c['type'], ha='center', fontsize=6)
-
-                        # Graphs
-                        ax_p1.plot(x_vals, [y/1000 for y in M_v], 'b'); ax_p1.set_ylabel("Vert (Nm)"); ax_p1.grid(True, alpha=0.3)
-                        ax_p1.set_title("Vertical Bending Moment", fontsize=8, color='blue', loc='left')
-                        ax_p1.fill_between(x_vals, [y/1000 for y in M_v], color='blue', alpha=0.1)
-                        
-                        ax_p2.plot(x_vals, [y/1000 for y in M_h], 'g'); ax_p2.set_ylabel("Horz (Nm)"); ax_p2.grid(True, alpha=0.3)
-                        ax_p2.set_title("Horizontal Bending Moment", fontsize=8, color='green', loc='left')
-                        ax_p2.fill_between(x_vals, [y/1000 for y in M_h], color='green', alpha=0.1)
-
-                        ax_p3.plot(x_vals, [y/1000 for y in M_res], 'r'); ax_p3.set_ylabel("Res (Nm)"); ax_p3.grid(True, alpha=0.3)
-                        ax_p3.set_title(f"Resultant Moment (Max: {max_M/1000:.1f} Nm)", fontsize=8, color='red', loc='left')
-                        ax_p3.fill_between(x_vals, [y/1000 for y in M_res], color='red', alpha=0.1)
-
-                        plt.tight_layout()
-                        
-                        # Save & Embed
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmpfile:
-                            fig_pdf.savefig(tmpfile.name, dpi=150)
-                            tmp_name = tmpfile.name
-                        
-                        pdf.image(tmp_name, x=10, y=40, w=190)
-                        os.unlink(tmp_name)
-
-                    # --- PAGE 3: DETAILED CALCULATIONS ---
-                    pdf.add_page()
-                    pdf.set_font("Arial", "B", 12)
-                    pdf.cell(0, 10, "DETAILED CALCULATIONS", ln=True)
-                    pdf.ln(5)
-
-                    # A. Allowable Stress
-                    pdf.set_font("Arial", "B", 10)
-                    pdf.cell(0, 6, "A. Allowable Stress (Tau)", ln=True)
-                    pdf.set_font("Arial", "", 10)
-                    base_tau = min(0.3*sy_input, 0.18*sut_input)
-                    pdf.cell(0, 6, f"Sy: {sy_input} MPa, Sut: {sut_input} MPa", ln=True)
-                    pdf.cell(0, 6, f"Base Tau = min(0.3*Sy, 0.18*Sut) = {base_tau:.1f} MPa", ln=True)
-                    pdf.cell(0, 6, f"Keyway Factor = {0.75 if keyway_present else 1.0}", ln=True)
-                    pdf.cell(0, 6, f"Final Tau_allow = {tau_allow:.2f} MPa", ln=True)
-                    pdf.ln(5)
-
-                    # B. Equivalent Moment
-                    pdf.set_font("Arial", "B", 10)
-                    pdf.cell(0, 6, "B. Equivalent Moment (M_eq)", ln=True)
-                    pdf.set_font("Arial", "", 10)
-                    pdf.cell(0, 6, f"Max Bending (M) = {max_M/1000:.1f} Nm", ln=True)
-                    pdf.cell(0, 6, f"Torque (T) = {T_nmm/1000:.1f} Nm", ln=True)
-                    pdf.cell(0, 6, f"Shock Factors: Kb={kb_input}, Kt={kt_input}", ln=True)
-                    pdf.cell(0, 6, f"M_eq = sqrt( (Kb*M)^2 + (Kt*T)^2 )", ln=True)
-                    pdf.cell(0, 6, f"M_eq = {M_eq/1000:.1f} Nm", ln=True)
-                    pdf.ln(5)
-
-                    # C. Diameter
-                    pdf.set_font("Arial", "B", 10)
-                    pdf.cell(0, 6, "C. Diameter Calculation", ln=True)
-                    pdf.set_font("Arial", "", 10)
-                    pdf.cell(0, 6, "d = [ (16 * M_eq) / (pi * Tau) ] ^ (1/3)", ln=True)
-                    pdf.set_font("Arial", "B", 12)
-                    pdf.cell(0, 10, f"d = {d_req:.3f} mm", ln=True)
-
-                    return pdf.output(dest='S').encode('latin-1')
-
-                # --- DOWNLOAD BUTTON ---
-                pdf_bytes = generate_pdf()
-                st.download_button(
-                    label="📥 Download Design Data Sheet (PDF)",
-                    data=pdf_bytes,
-                    file_name="Shaft_Design_Data_Sheet.pdf",
-                    mime="application/pdf",
-                    use_container_width=True
-                )
-
-            else:
-                st.error("⚠️ Topology Error: Supports must be separated (Span > 0).")
-        else:
-            # Show empty schematic if analysis not possible
-            st.pyplot(fig)
-            st.warning("⚠️ TOPOLOGY INCOMPLETE: Please initialize 2 Bearings.")
-    else:
-        # Show schematic if button not pressed
-        st.pyplot(fig)
+        # --- RESULTS BOX ---
+        st.success(f"### ✅ MINIMUM DIAMETER: {d_req:.3f} mm")
+        
+        with st.expander("See Calculation Details"):
+            st.write(f"**Torque:** {T_nmm/1000:.2f} Nm")
+            st.write(f"**Max Bending Moment:** {max_M/1000:.2f} Nm")
+            st.write(f"**Allowable Shear:** {tau_allow:.2f} MPa")
+            st.write(f"**Reaction A:** V:{int(Rav)}N / H:{int(Rah)}N")
+            st.write(f"**Reaction B:** V:{int(Rbv)}N / H:{int(Rbh)}N")
+
+        # --- DOWNLOAD BUTTON ---
+        # Built lazily on click; build_pdf is cached so repeat clicks are free
+        pdf_inputs = (p_input, n_input, len_input, mat_choice,
+                      sy_input, sut_input, kb_input, kt_input, keyway_present)
+        pdf_results = (T_nmm, Rav, Rah, Rbv, Rbh, max_M, res['base_tau'], tau_allow, M_eq, d_req)
+        pdf_components = tuple(zip(comps['type'], comps['pos'], res['fv'], res['fh']))
+        st.download_button(
+            label="📥 Download Design Data Sheet (PDF)",
+            data=lambda: build_pdf(pdf_inputs, pdf_results, pdf_components, x_vals, M_v_nm, M_h_nm, M_res_nm),
+            file_name="Shaft_Design_Data_Sheet.pdf",
+            mime="application/pdf",
+            use_container_width=True
+        )
+    elif not st.session_state.run_analysis:
+        # Schematic only until the button is pressed
         st.info("👆 Configure nexus components and click 'ACTIVATE SIMULATION CORE'.")
+    elif len(bearings) != 2:
+        st.warning("⚠️ TOPOLOGY INCOMPLETE: Please initialize 2 Bearings.")
+    else:
+        st.error("⚠️ Topology Error: Supports must be separated (Span > 0).")
+
+with col_viz:
+    render_results(len_input, p_input, n_input, mat_choice,
+                   sy_input, sut_input, kb_input, kt_input, keyway_present)
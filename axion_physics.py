@@ -0,0 +1,63 @@
+"""Numeric core of Axion_app.py.
+
+Kept outside the Streamlit script because the script body re-executes on every
+rerun; module-level state here (the compiled numba dispatcher, the torque LRU
+cache) is built once per process instead.
+"""
+import functools
+import math
+import numpy as np
+
+try: # Optional: JIT-compiles the moment kernel when installed
+    from numba import njit
+except ImportError:
+    njit = None
+
+@functools.lru_cache(maxsize=32)
+def get_torque(P_kw, N_rpm):
+    """Calculates Torque in N-mm from Power (kW) and Speed (RPM)"""
+    if N_rpm <= 0: return 0
+    P = P_kw * 1000 # Convert to Watts
+    # T = (P * 60) / (2 * pi * N)
+    return ((P * 60) / (2 * math.pi * N_rpm)) * 1000
+
+def _moments_scalar(x_vals, pos, fv, fh):
+    """V/H bending moments (N-mm) at each x from point loads, as one prefix-sum pass.
+    Each load is binned at the first station past it; with running sums of F and F*pos,
+    M(x) = x*sum(F) - sum(F*pos) over the loads left of x (exact Macaulay brackets).
+    Returns a (2, N) array: row 0 = M_v, row 1 = M_h."""
+    N = x_vals.size
+    start = np.searchsorted(x_vals, pos, side='right')
+    # rows: F_v, F_h, F_v*pos, F_h*pos
+    d = np.zeros((4, N + 1))
+    for k in range(pos.size):
+        d[0, start[k]] += fv[k]
+        d[1, start[k]] += fh[k]
+        d[2, start[k]] += fv[k] * pos[k]
+        d[3, start[k]] += fh[k] * pos[k]
+    M = np.empty((2, N))
+    sv = sh = sav = sah = 0.0
+    for i in range(N):
+        sv += d[0, i]
+        sh += d[1, i]
+        sav += d[2, i]
+        sah += d[3, i]
+        M[0, i] = x_vals[i] * sv - sav
+        M[1, i] = x_vals[i] * sh - sah
+    return M
+
+def _moments_numpy(x_vals, pos, fv, fh):
+    """Same prefix-sum as _moments_scalar: scatter loads into bins, then one cumsum per plane"""
+    N = x_vals.size
+    start = np.searchsorted(x_vals, pos, side='right')
+    # rows: F_v, F_h, F_v*pos, F_h*pos
+    d = np.zeros((4, N + 1))
+    np.add.at(d, (slice(None), start), np.array([fv, fh, fv * pos, fh * pos]))
+    S = np.cumsum(d[:, :N], axis=1)
+    return x_vals * S[:2] - S[2:]
+
+# Compiled scalar loop if numba is available, otherwise the NumPy cumsum. The eager
+# signature (contiguous float64 in, C-order (2, N) out) compiles when this module is
+# first imported, i.e. once per server process, not on the first analysis click.
+MOMENTS_SIG = 'f8[:, ::1](f8[::1], f8[::1], f8[::1], f8[::1])'
+compute_moments = njit(MOMENTS_SIG, cache=True, fastmath=True)(_moments_scalar) if njit else _moments_numpy